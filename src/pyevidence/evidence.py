@@ -1,14 +1,99 @@
+from concurrent.futures import ProcessPoolExecutor
 from functools import reduce
 from itertools import product, chain
+import multiprocessing
 import random
 import numpy as np
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; approx falls back to the numpy path.
+    njit = None
+
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _approx_kernel(Es, q, lo, hi, yager):
+        """Count belief/plausibility hits over (sources, n) packed uint64 samples."""
+        S, n = Es.shape
+        bel, pl = 0, 0
+
+        for j in prange(n):
+            acc = Es[0, j]
+            for s in range(1, S):
+                acc &= Es[s, j]
+                if (acc - lo) & ~acc & hi != 0:
+                    break  # AND is monotone: a zeroed slot field stays zero.
+
+            if (acc - lo) & ~acc & hi != 0:  # conflict: combined sample is empty.
+                if yager:
+                    pl += 1
+                else:
+                    all_imply, any_inter = True, False
+                    for s in range(S):
+                        e = Es[s, j]
+                        all_imply = all_imply and e & q == e
+                        x = e & q
+                        any_inter = any_inter or (x - lo) & ~x & hi == 0
+                    bel += 1 if all_imply else 0
+                    pl  += 1 if any_inter else 0
+            else:
+                x = acc & q
+                bel += 1 if acc & q == acc else 0
+                pl  += 1 if (x - lo) & ~x & hi == 0 else 0
+
+        return bel, pl
+
+
+def _count(Es, qb, lo, hi, yager):
+    """Belief/plausibility hit counts for (sources, n) packed samples of q."""
+    if njit is not None and Es.dtype != object:
+        return _approx_kernel(Es, qb, np.uint64(lo), np.uint64(hi), yager)
+
+    swar_zero = lambda x: ((x - lo) & ~x & hi) != 0  # any slot field of x zero.
+
+    # conjunct all sampled focal elements; AND is monotone, so stop once
+    # every sample in the batch is already conflicted.
+    combined = Es[0].copy()
+    for e in Es[1:]:
+        np.bitwise_and(combined, e, out=combined)
+        if swar_zero(combined).all():
+            break
+
+    x = combined & qb  # reused by both predicates below.
+
+    empty        = swar_zero(combined)
+    implies_q    = x == combined
+    intersects_q = ~swar_zero(x)
+
+    # conflict resolution (empty samples) fused into the two masks.
+    if yager:
+        bel_mask = ~empty & implies_q
+        pl_mask  = ~empty & intersects_q | empty
+    else:
+        y = Es & qb
+        bel_mask = ~empty & implies_q | empty & (y == Es).all(axis=0)
+        pl_mask  = ~empty & intersects_q | empty & (~swar_zero(y)).any(axis=0)
+
+    return int(bel_mask.sum()), int(pl_mask.sum())
+
+
+def _approx_worker(args):
+    """approx_many worker: sample and count one query with its own seed."""
+    bits, cdfs, qb, lo, hi, yager, n, seed = args
+    rng = np.random.default_rng(seed)
+    Es = np.stack([b[np.searchsorted(c, rng.random(n))]
+                   for b, c in zip(bits, cdfs)])
+    bel, pl = _count(Es, qb, lo, hi, yager)
+    return bel / n, pl / n
+
 
 class Subset:
-    """Bitset-encoded constraints over `slots`, each slot is a subset of an `opts` list."""
+    """Bitset-encoded constraints over `slots`, packed into a single integer bitmask."""
 
     def __init__(self, parent, settings, slots, opts, defaults):
-        """Build per-slot bitmasks from `settings` (slot index -> allowed options)."""
+        """Build the packed bitmask from `settings` (slot index -> allowed options)."""
 
         assert isinstance(parent, Subsets) and \
             isinstance(opts, list) and \
@@ -17,60 +102,82 @@ class Subset:
             len(opts) == len(defaults) == slots
         self.parent = parent
         self.slots = slots
-        self.defaults = defaults
         self.opts = opts
-        self.bits = defaults[:]
 
+        bits = 0
         f = lambda a, b: a | b
 
-        for i, Os in settings.items():
+        for i in range(slots):
+            Os = settings.get(i, [])
             assert isinstance(Os, list)
             assert all(o in opts[i] for o in Os)
             if Os == []:
-                self.bits[i] = defaults[i] # default to no constraint (Ω).
+                bits |= parent.omegas[i]  # default to no constraint (Ω).
             else:
-                self.bits[i] = reduce(f, (2**opts[i].index(o) for o in Os))  # options mask.
+                bits |= reduce(f, (parent.masks[i][o] for o in Os))  # options mask.
+
+        self.bits = bits
+        self._empty = None  # lazy is_empty/is_omega caches.
+        self._omega = None
 
     def conj(self, s0):
-        """Conjunction (intersection) of constraints: per-slot bitwise AND."""
-        self.bits = [a & b for a, b in zip(self.bits, s0.bits)]
+        """Conjunction (intersection) of constraints: bitwise AND of packed masks."""
+        self.bits &= s0.bits
+        self._empty = self._omega = None
         return self
 
     def hull(self, s0):
-        """Disjunction/upper hull (union) of constraints: per-slot bitwise OR."""
-        self.bits = [a | b for a, b in zip(self.bits, s0.bits)]
+        """Disjunction/upper hull (union) of constraints: bitwise OR of packed masks."""
+        self.bits |= s0.bits
+        self._empty = self._omega = None
         return self
 
     def is_empty(self):
-        """True iff any slot has no allowed options (mask = 0)."""
-        return any(x == 0 for x in self.bits)
+        """True iff any slot has no allowed options (SWAR any-slot-field-zero)."""
+        if self._empty is None:
+            x = self.bits
+            self._empty = (x - self.parent.lo) & ~x & self.parent.hi != 0
+        return self._empty
 
     def is_omega(self):
-        """True iff all slots are unconstrained (mask = default = all 1s)."""
-        return all(x == d for x,d in zip(self.bits, self.defaults))
+        """True iff all slots are unconstrained (mask = Ω = all 1s)."""
+        if self._omega is None:
+            self._omega = self.bits == self.parent.omega
+        return self._omega
 
     def implies(self, s0):
-        """Subset implication: every slot's mask is contained in s0's mask."""
-        return all(a & b == a for a, b in zip(self.bits, s0.bits))
+        """Subset implication: this mask is contained in s0's mask."""
+        return self.bits & s0.bits == self.bits
 
     def intersects(self, s0):
-        """Non-empty intersection per slot: all slotwise ANDs are nonzero."""
-        return all(a & b != 0 for a, b in zip(self.bits, s0.bits))
+        """Non-empty intersection per slot: no slot field of the AND is zero."""
+        x = self.bits & s0.bits
+        return (x - self.parent.lo) & ~x & self.parent.hi == 0
+
+    def __slot_bits(self, i):
+        """Extract slot i's mask from the packed bitmask."""
+        return (self.bits >> self.parent.shifts[i]) & self.parent.field
 
     def __to_opts(self, x, opts):
-        """Decode a bitmask into the corresponding list of option labels."""
+        """Decode a slot bitmask into option labels by iterating its set bits."""
         assert isinstance(x, int)
-        pos = [(i, 2**y) for i, y in enumerate(range(len(opts)))]
-        return [opts[i] for i, y in pos if x & y == y]
+        out = []
+        while x:
+            lsb = x & -x  # lowest set bit.
+            out.append(opts[lsb.bit_length() - 1])
+            x ^= lsb
+        return out
 
     def generate(self):
         """Enumerate all assignments consistent with this subset (Cartesian product)."""
-        return product(*[self.__to_opts(x, opts) for x, opts in zip(self.bits, self.opts)])
+        return product(*[self.__to_opts(self.__slot_bits(i), opts)
+                         for i, opts in enumerate(self.opts)])
 
     def schema(self):
         """Readable per-slot constraint schema (`*` for unconstrained)."""
-        xs = [self.__to_opts(x, opts) for x, opts in zip(self.bits, self.opts)]
-        xs = ['*' if x == opts else str(set(x)) for x, opts in zip(xs, self.opts)]
+        xs = [(self.__slot_bits(i), opts) for i, opts in enumerate(self.opts)]
+        xs = ['*' if x == self.parent.defaults[i] else str(set(self.__to_opts(x, opts)))
+              for i, (x, opts) in enumerate(xs)]
         return " ".join(xs)
 
 
@@ -83,12 +190,32 @@ class Subsets:
         self.opts = opts
         self.slots = slots
         self.defaults = [int("".join(["1"] * len(os)), 2) for os in opts] # Ω mask.
+        self.width = max(len(os) for os in opts)            # fixed bit width per slot.
+        self.field = (1 << self.width) - 1                  # single-slot extraction mask.
+        self.shifts = [i * self.width for i in range(slots)]
+        self.omegas = [d << s for d, s in zip(self.defaults, self.shifts)]
+        self.masks = [{o: 1 << (k + s) for k, o in enumerate(os)}
+                      for os, s in zip(opts, self.shifts)]  # option -> packed bit.
+        self.omega = reduce(lambda a, b: a | b, self.omegas)
+        self.lo = reduce(lambda a, b: a | b, (1 << s for s in self.shifts))
+        self.hi = self.lo << (self.width - 1)  # SWAR: low/high bit of each slot field.
+        self.dtype = np.uint64 if slots * self.width <= 64 else object
 
     def new(self, settings=dict()):
         """Create a new Subset with given per-slot constraints."""
         assert isinstance(settings, dict)
+        if not settings:
+            return self.new_omega()
         return Subset(self, settings, self.slots, self.opts, self.defaults)
 
+    def new_omega(self):
+        """Unconstrained Ω Subset, skipping the per-slot __init__ work."""
+        s = object.__new__(Subset)
+        s.parent, s.slots, s.opts = self, self.slots, self.opts
+        s.bits = self.omega
+        s._empty, s._omega = False, True
+        return s
+
 
 class Mass:
     """A basic probability mass function over Subset focal elements (must sum to 1)."""
@@ -98,6 +225,7 @@ class Mass:
         self.P = 0.0
         self.mass = []
         self.probs = []
+        self._bits = None
 
     def add(self, s0, p):
         """Add focal element `s0` with mass `p`, tracking total mass."""
@@ -106,6 +234,7 @@ class Mass:
         self.mass.append(s0)
         self.probs.append(p)
         self.P += p
+        self._bits = None  # invalidate prepared arrays.
         return self
 
     def is_valid(self):
@@ -113,9 +242,31 @@ class Mass:
         assert abs(self.P - 1.0) <= 1e-8
         return True
 
+    def _prepare(self):
+        """Lazily stack focal bitmasks and probabilities into ndarrays."""
+        if self._bits is None:
+            self._bits = np.array([s.bits for s in self.mass],
+                                  dtype=self.mass[0].parent.dtype)
+            self._probs = np.asarray(self.probs)
+            self._cdf = np.cumsum(self._probs)
+            self._cdf[-1] = 1.0  # guard the top bin against float drift.
+        return self._bits, self._probs
+
+    def sample_indices(self, n):
+        """Draw `n` focal indices by inverse-CDF lookup (no object-dtype choice).
+
+        Uniforms come from the legacy global RNG so np.random.seed
+        reproduces draws, as it did before the CDF sampler."""
+        self._prepare()
+        return np.searchsorted(self._cdf, np.random.random_sample(n))
+
     def sample(self, k=1):
         """Sample focal elements according to their masses."""
-        return np.random.choice(self.mass, p=self.probs, size=k)
+        return [self.mass[i] for i in self.sample_indices(k)]
+
+    def sample_bits(self, n):
+        """Sample `n` packed focal bitmasks according to their masses."""
+        return self._bits[self.sample_indices(n)]
 
 
 class Inference:
@@ -128,23 +279,42 @@ class Inference:
         assert method in (Inference.YAGER, Inference.DP)
         self.mass = []
         self.method = method
+        self._M = None
+        self._coarse = {}
 
     def add_mass(self, m):
         """Register a normalized mass function."""
         assert isinstance(m, Mass)
         m.is_valid()
         self.mass.append(m)
+        self._M = None      # invalidate compiled focal arrays
+        self._coarse = {}   # and cached per-query sums.
         return self
 
+    def _compile(self):
+        """Lazily gather per-mass focal bitmask and probability arrays."""
+        if self._M is None:
+            prepped = [m._prepare() for m in self.mass]
+            self._M = [bits for bits, _ in prepped]
+            self._P = [probs for _, probs in prepped]
+        return self._M, self._P
+
     def coarse(self, q):
         """Order-invariant Yager coarse bounds on the induced frame {q, ¬q, Ω}."""
         assert isinstance(q, Subset) and len(self.mass) > 0
         assert not q.is_empty() and not q.is_omega()
 
-        As = [sum(p for x, p in zip(mm.mass, mm.probs) if x.implies(q))
-              for mm in self.mass]
-        Bs = [sum(p for x, p in zip(mm.mass, mm.probs) if not x.intersects(q))
-              for mm in self.mass]
+        if q.bits not in self._coarse:  # sweeps repeat structurally similar queries.
+            lo, hi = q.parent.lo, q.parent.hi
+            swar_zero = lambda x: ((x - lo) & ~x & hi) != 0  # any slot field of x zero.
+            qb = q.bits if q.parent.dtype is object else q.parent.dtype(q.bits)
+
+            M, P = self._compile()
+            self._coarse[q.bits] = (
+                [float(p[(m & qb) == m].sum()) for m, p in zip(M, P)],
+                [float(p[swar_zero(m & qb)].sum()) for m, p in zip(M, P)])
+
+        As, Bs = self._coarse[q.bits]
 
         a, b = As[0], Bs[0]
         u    = 1.0 - a - b
@@ -164,24 +334,42 @@ class Inference:
         """Monte Carlo estimate of belief/plausibility under random sampling."""
         assert isinstance(q, Subset) and len(self.mass) > 0
         assert not q.is_empty() and not q.is_omega()
-        belief, plausibility = 0, 0
 
-        Es = [m.sample(k=n) for m in self.mass]  # iid samples per source mass function.
-        f = lambda a, b: a.conj(b)               # combine samples by conjunction.
+        qb = q.bits if q.parent.dtype is object else q.parent.dtype(q.bits)
 
-        for j in range(n):
-            E = [x[j] for x in Es]
-            S = reduce(f, E, q.parent.new())     # conjunct all sampled focal elements.
-
-            if not S.is_empty():
-                belief += 1 if S.implies(q) else 0
-                plausibility += 1 if S.intersects(q) else 0
-            else:
-                # conflict resolution when combined sample is empty.
-                if self.method == Inference.YAGER:
-                    plausibility += 1
-                else:
-                    belief += 1 if all(s.implies(q) for s in E) else 0
-                    plausibility += 1 if any(e.intersects(q) for e in E) else 0
+        # (sources, n) matrix of iid sampled packed focal bitmasks per source.
+        self._compile()
+        Es = np.stack([m.sample_bits(n) for m in self.mass])
 
+        belief, plausibility = _count(Es, qb, q.parent.lo, q.parent.hi,
+                                      self.method == Inference.YAGER)
         return belief / n, plausibility / n
+
+    def approx_many(self, qs, n=999, jobs=None, seed=None):
+        """Monte Carlo estimates for many queries, parallel across processes
+        (numpy path) or within the compiled kernel (numba path)."""
+        assert isinstance(qs, list) and len(qs) > 0 and len(self.mass) > 0
+        assert all(isinstance(q, Subset) for q in qs)
+        assert all(q.parent is qs[0].parent for q in qs)
+        assert all(not q.is_empty() and not q.is_omega() for q in qs)
+
+        self._compile()
+        parent = qs[0].parent
+        bits   = [m._bits for m in self.mass]
+        cdfs   = [m._cdf for m in self.mass]
+        yager  = self.method == Inference.YAGER
+        seeds  = np.random.SeedSequence(seed).spawn(len(qs))
+
+        args = [(bits, cdfs,
+                 q.bits if parent.dtype is object else parent.dtype(q.bits),
+                 parent.lo, parent.hi, yager, n, s)
+                for q, s in zip(qs, seeds)]
+
+        # with numba present the kernel already parallelizes each query across
+        # cores, and forking after its threading layer starts would deadlock
+        # the workers; run the queries serially through the kernel instead.
+        if jobs == 1 or njit is not None:
+            return [_approx_worker(a) for a in args]
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            return list(pool.map(_approx_worker, args))
@@ -162,3 +162,57 @@ class TestInference(unittest.TestCase):
         assert abs(bel1 - bel2) < 1e-2
         assert abs(pl1  - pl2) < 1e-2
         assert 0 <= bel1 <= pl1 <= 1
+
+
+    def test_wide_universe_falls_back_beyond_64_bits(self):
+        # 70 options in one slot cannot pack into uint64; the object-dtype
+        # bigint path must give the same answers as the narrow path.
+        np.random.seed(4)
+        opts = [['o%d' % i for i in range(70)]]
+        subs = Subsets(1, opts)
+
+        q   = subs.new({0: ['o%d' % i for i in range(10)]})
+        s1  = subs.new({0: ['o1']})           # implies q
+        s2  = subs.new({0: ['o1', 'o50']})    # intersects q but does not imply
+        s3  = subs.new({0: ['o65']})          # does not intersect q
+        omg = subs.new()
+
+        assert s1.implies(q) and s2.intersects(q)
+        assert not s2.implies(q) and not s3.intersects(q)
+        assert subs.new({0: ['o1']}).conj(subs.new({0: ['o65']})).is_empty()
+
+        m = Mass().add(s1, 0.30).add(s2, 0.20).add(s3, 0.10).add(omg, 0.40)
+        infer = Inference().add_mass(m)
+
+        bel_c, pl_c = infer.coarse(q)   # exact for a single source
+        bel_a, pl_a = infer.approx(q, n=20000)
+
+        assert abs(bel_c - 0.30) < 1e-12
+        assert abs(pl_c - 0.90) < 1e-12
+        assert abs(bel_a - 0.30) < 0.02
+        assert abs(pl_a - 0.90) < 0.02
+
+
+    def test_approx_many_matches_exact_and_is_seeded(self):
+        opts = [['a', 'b']]
+        subs = Subsets(1, opts)
+        q, nq, omg = subs.new({0: ['a']}), subs.new({0: ['b']}), subs.new()
+
+        m1 = Mass().add(q, 0.2).add(nq, 0.3).add(omg, 0.5)
+        m2 = Mass().add(q, 0.6).add(nq, 0.1).add(omg, 0.3)
+
+        infer = Inference(method=Inference.YAGER).add_mass(m1).add_mass(m2)
+
+        a_exact, b_exact, _ = self._exact_yager_three_state([(0.2, 0.3, 0.5),
+                                                             (0.6, 0.1, 0.3)])
+
+        results = infer.approx_many([q, nq], n=20000, seed=5)
+        (bel_q, pl_q), (bel_nq, pl_nq) = results
+
+        assert abs(bel_q - a_exact) < 0.02
+        assert abs(pl_q - (1 - b_exact)) < 0.02
+        assert abs(bel_nq - b_exact) < 0.02
+        assert abs(pl_nq - (1 - a_exact)) < 0.02
+
+        # same seed => identical draws, with or without the process pool.
+        assert results == infer.approx_many([q, nq], n=20000, seed=5, jobs=1)
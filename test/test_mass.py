@@ -24,11 +24,10 @@ class TestMass(unittest.TestCase):
         samples = defaultdict(lambda: 0)
         for _ in range(10000):
             x = mass.sample()[0]
-            samples[tuple(x.bits)] += 1
+            samples[x.bits] += 1
 
         samples = sorted([(n,k,) for k,n in samples.items()])
-        assert [tuple(sub1.bits), tuple(sub3.bits), tuple(sub2.bits)] \
-            == [k for _, k in samples]
+        assert [sub1.bits, sub3.bits, sub2.bits] == [k for _, k in samples]
 
 if __name__ == "__main__":
     unittest.main()